@@ -1,13 +1,16 @@
 """
 AI Client - app/ai/client.py
 All Groq API calls go through here.
-Features: retry, model fallback, timeout, structured error handling.
+Features: retry, model fallback, timeout, structured error handling, streaming.
 """
 
 import os
 import time
 import logging
+import orjson
 import requests
+from app.core.http import make_session
+from app.ai.stream import IncrementalJSONParser
 
 log = logging.getLogger(__name__)
 
@@ -18,18 +21,21 @@ PRIMARY_MODEL = "llama-3.3-70b-versatile"
 FALLBACK_MODEL = "llama-3.1-8b-instant"
 MAX_RETRIES = 3
 
+# Pooled session — reuses TLS connections to api.groq.com across calls
+_session = make_session({"Content-Type": "application/json"})
 
 class AIError(Exception):
-    pass
+    def __init__(self, message: str, failed_generation: str = None):
+        super().__init__(message)
+        self.failed_generation = failed_generation
 
 
 def _call_groq(model: str, system: str, user: str,
-               max_tokens: int, temperature: float, timeout: int) -> str:
-    """Single Groq API call. Returns raw text content."""
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json",
-    }
+               max_tokens: int, temperature: float, timeout: int,
+               json_mode: bool = False) -> str:
+    """Single Groq API call. Returns raw text content.
+    json_mode=True constrains the model to emit a single JSON object."""
+    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
     payload = {
         "model": model,
         "max_tokens": max_tokens,
@@ -39,43 +45,55 @@ def _call_groq(model: str, system: str, user: str,
             {"role": "user", "content": user},
         ],
     }
-    r = requests.post(GROQ_URL, headers=headers, json=payload, timeout=timeout)
+    if json_mode:
+        payload["response_format"] = {"type": "json_object"}
+    r = _session.post(GROQ_URL, headers=headers, data=orjson.dumps(payload), timeout=timeout)
 
     if r.status_code == 429:
         retry_after = int(r.headers.get("Retry-After", 30))
         raise AIError(f"RATE_LIMIT:{retry_after}")
 
+    if 400 <= r.status_code < 500:
+        # Request-level rejection (bad payload, JSON mode validation) — retrying
+        # the same request fails the same way
+        error = _error_body(r)
+        raise AIError(f"REJECTED:{error.get('code') or r.status_code}",
+                      error.get("failed_generation"))
+
     r.raise_for_status()
-    return r.json()["choices"][0]["message"]["content"]
+    return orjson.loads(r.content)["choices"][0]["message"]["content"]
+
+
+def _error_body(r) -> dict:
+    try:
+        error = orjson.loads(r.content).get("error")
+    except (orjson.JSONDecodeError, AttributeError):
+        return {}
+    return error if isinstance(error, dict) else {}
 
 
 def groq_ask(system: str, user: str,
-             max_tokens: int = 1500,
+             max_tokens: int = 500,
              fast: bool = False,
-             temperature: float = 0.2,
+             temperature: float = 0.0,
              timeout: int = 45) -> dict:
     """
-    Call Groq and return parsed JSON dict.
+    Call Groq in JSON mode and return the parsed dict.
     - Tries primary model first (70B), falls back to 8B on rate limit
     - Retries up to MAX_RETRIES times with backoff
     - Returns {"error": "..."} if all attempts fail — never raises
     """
-    import re, json as _json
-
     models = [FALLBACK_MODEL] if fast else [PRIMARY_MODEL, FALLBACK_MODEL]
 
     for model in models:
         for attempt in range(MAX_RETRIES):
             try:
-                text = _call_groq(model, system, user, max_tokens, temperature, timeout)
-
-                # Extract JSON from response
-                match = re.search(r'\{[\s\S]*\}', text)
-                if not match:
-                    log.warning(f"[{model}] No JSON in response: {text[:100]}")
+                text = _call_groq(model, system, user, max_tokens, temperature, timeout,
+                                  json_mode=True)
+                parsed = orjson.loads(text)
+                if not isinstance(parsed, dict):
+                    log.warning(f"[{model}] Non-object JSON in response: {text[:100]}")
                     return {"raw": text}
-
-                parsed = _json.loads(match.group())
                 return parsed
 
             except AIError as e:
@@ -85,10 +103,16 @@ def groq_ask(system: str, user: str,
                     log.warning(f"[{model}] Rate limit — waiting {wait}s before fallback")
                     time.sleep(min(wait, 30))
                     break   # try next model
+                if msg.startswith("REJECTED:"):
+                    log.warning(f"[{model}] Request rejected: {msg}")
+                    # json_validate_failed: output didn't parse (e.g. cut off at max_tokens)
+                    if msg == "REJECTED:json_validate_failed" and e.failed_generation:
+                        return {"raw": e.failed_generation}
+                    break   # model-specific (decommissioned, too large...) — try next model
                 log.warning(f"[{model}] attempt {attempt+1} AIError: {e}")
                 time.sleep(2 ** attempt)
 
-            except _json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 log.warning(f"[{model}] JSON parse failed: {e}")
                 return {"raw": text if 'text' in dir() else ""}
 
@@ -104,17 +128,95 @@ def groq_ask(system: str, user: str,
     return {"error": "AI temporarily unavailable"}
 
 
+def _stream_groq(model: str, system: str, user: str,
+                 max_tokens: int, temperature: float, timeout: int):
+    """Single streaming Groq API call. Yields content deltas as they arrive."""
+    headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
+    payload = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "stream": True,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+    }
+    with _session.post(GROQ_URL, headers=headers, data=orjson.dumps(payload),
+                       timeout=timeout, stream=True) as r:
+        if r.status_code == 429:
+            retry_after = int(r.headers.get("Retry-After", 30))
+            raise AIError(f"RATE_LIMIT:{retry_after}")
+
+        r.raise_for_status()
+        r.encoding = "utf-8"
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            delta = orjson.loads(data)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+def groq_ask_stream(system: str, user: str,
+                    max_tokens: int = 500,
+                    fast: bool = False,
+                    temperature: float = 0.0,
+                    timeout: int = 45):
+    """
+    Stream a Groq JSON response and yield (key, value) for each top-level
+    field as soon as it is complete.
+    - If the stream fails before the object closes, falls back to groq_ask
+      and yields only the fields not already yielded
+    - Never raises
+    """
+    model = FALLBACK_MODEL if fast else PRIMARY_MODEL
+    parser = IncrementalJSONParser()
+    seen = set()
+
+    try:
+        for delta in _stream_groq(model, system, user, max_tokens, temperature, timeout):
+            for key, value in parser.feed(delta):
+                seen.add(key)
+                yield key, value
+            if parser.done:
+                return
+    except Exception as e:
+        log.warning(f"[{model}] Streaming failed after {len(seen)} field(s): {e}")
+    else:
+        # Stream ended without closing the object — it ran out of tokens,
+        # so the fallback call gets a larger budget
+        log.warning(f"[{model}] Stream truncated after {len(seen)} field(s)")
+        max_tokens *= 2
+
+    for key, value in groq_ask(system, user, max_tokens, fast, temperature, timeout).items():
+        # "error"/"raw" mark a failed call — once real fields have been
+        # streamed they would only make the caller discard them
+        if key in seen or (seen and key in ("error", "raw")):
+            continue
+        yield key, value
+
+
 def groq_text(system: str, user: str,
               max_tokens: int = 800,
-              timeout: int = 30) -> str:
+              timeout: int = 30,
+              complex: bool = False) -> str:
     """
     Call Groq and return plain text.
+    Uses the fast 8B model unless complex=True (long-form answers get the 70B).
     Returns fallback string if all attempts fail — never raises.
     """
+    model = PRIMARY_MODEL if complex else FALLBACK_MODEL
     for attempt in range(MAX_RETRIES):
         try:
-            return _call_groq(FALLBACK_MODEL, system, user, max_tokens, 0.3, timeout)
+            return _call_groq(model, system, user, max_tokens, 0.3, timeout)
         except AIError as e:
+            if str(e).startswith("REJECTED:"):
+                log.warning(f"groq_text request rejected: {e}")
+                break
             if "RATE_LIMIT" in str(e):
                 time.sleep(15)
             else:
@@ -0,0 +1,74 @@
+"""
+Streaming JSON Parser - app/ai/stream.py
+Incrementally parses a streamed JSON object and emits each top-level
+field as soon as its value is complete. No external dependency needed.
+
+Usage:
+    parser = IncrementalJSONParser()
+    for chunk in chunks:
+        for key, value in parser.feed(chunk):
+            ...
+"""
+
+import orjson
+
+
+class IncrementalJSONParser:
+    """
+    Brace-depth tracker for a single top-level JSON object.
+    Text before the opening brace (e.g. a ```json fence) is ignored,
+    as is anything after the closing brace.
+    """
+
+    def __init__(self):
+        self._member: list = []   # chars of the current top-level "key": value
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+
+    def feed(self, text: str) -> list:
+        """Consume a chunk. Returns [(key, value), ...] for fields completed by it."""
+        fields = []
+        for ch in text:
+            if self.done:
+                break
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    fields.extend(self._flush())
+                    self.done = True
+                    continue
+            elif ch == "," and self._depth == 1:
+                fields.extend(self._flush())
+                continue
+
+            self._member.append(ch)
+        return fields
+
+    def _flush(self) -> list:
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return []
+        try:
+            return list(orjson.loads("{" + member + "}").items())
+        except ValueError:
+            return []
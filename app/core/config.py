@@ -7,6 +7,8 @@ Falls back to safe defaults if file missing or malformed.
 import logging
 import base64
 from typing import Any
+import yaml
+from app.github.client import gh_get
 
 log = logging.getLogger(__name__)
 
@@ -42,8 +44,8 @@ DEFAULTS = {
     "ai": {
         "primary_model": "llama-3.3-70b-versatile",
         "fallback_model": "llama-3.1-8b-instant",
-        "max_tokens": 1500,
-        "temperature": 0.2,
+        "max_tokens": 500,
+        "temperature": 0.0,
         "timeout_seconds": 45,
     },
     "labels": {
@@ -119,11 +121,9 @@ def load_config(repo: str, token: str) -> Config:
     Returns Config with defaults if file not found or invalid.
     """
     try:
-        from app.github.client import gh_get
-        data = gh_get(f"/repos/{repo}/contents/.ai-repo-manager.yml", token)
+        data = gh_get(f"/repos/{repo}/contents/.ai-repo-manager.yml", token, conditional=True)
         content = base64.b64decode(data["content"]).decode("utf-8")
 
-        import yaml
         parsed = yaml.safe_load(content) or {}
         if not isinstance(parsed, dict):
             log.warning(f"[{repo}] .ai-repo-manager.yml is not a dict — using defaults")
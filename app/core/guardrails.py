@@ -8,12 +8,18 @@ Rule: If a guardrail fails → action is SKIPPED, reason is logged.
       Bot may post an informational comment but never takes the risky action.
 """
 
+import re
 import logging
 from dataclasses import dataclass
 from typing import Optional
 
 log = logging.getLogger(__name__)
 
+CONVENTIONAL = re.compile(
+    r'^(feat|fix|docs|style|refactor|perf|test|chore|ci|build|revert)(\(.+\))?(!)?: .+',
+    re.IGNORECASE
+)
+
 
 @dataclass
 class GuardrailResult:
@@ -133,11 +139,6 @@ def check_title_update(current_title: str, new_title: str, config) -> GuardrailR
         return GuardrailResult(passed=False, reason="Title unchanged — skipping update")
 
     # Don't update if title is already conventional commit format
-    import re
-    CONVENTIONAL = re.compile(
-        r'^(feat|fix|docs|style|refactor|perf|test|chore|ci|build|revert)(\(.+\))?(!)?: .+',
-        re.IGNORECASE
-    )
     if CONVENTIONAL.match(current_title):
         return GuardrailResult(
             passed=False,
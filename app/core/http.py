@@ -0,0 +1,32 @@
+"""
+HTTP Sessions - app/core/http.py
+Shared requests.Session factory with connection pooling.
+One session per upstream host keeps TCP + TLS connections warm across calls.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = "ai-repo-manager"
+
+
+def make_session(headers: dict = None,
+                 pool_connections: int = 16,
+                 pool_maxsize: int = 32) -> requests.Session:
+    """
+    Build a pooled session.
+    The adapter does not retry — the API clients own all retry logic, so
+    attempts aren't multiplied across two layers.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=0,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    if headers:
+        session.headers.update(headers)
+    return session
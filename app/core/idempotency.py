@@ -2,11 +2,14 @@
 Idempotency - app/core/idempotency.py
 Prevents processing same webhook event twice.
 Uses event fingerprint = sha256(delivery_id + event_type + payload_hash)
+Also coalesces distinct deliveries for the same logical event within a short
+window (e.g. a PR reopened twice in a row, or `/fix` posted twice).
 """
 
 import hashlib
 import time
 import logging
+import threading
 from collections import OrderedDict
 
 log = logging.getLogger(__name__)
@@ -16,13 +19,22 @@ _seen: OrderedDict = OrderedDict()
 _TTL_SECONDS = 3600   # forget events after 1 hour
 _MAX_SIZE = 2000       # max entries before eviction
 
+# Short-window coalescing: {(event, repo, number, action...): timestamp}
+_recent: OrderedDict = OrderedDict()
+_RECENT_LOCK = threading.Lock()
+RECENT_TTL_SECONDS = 30
+
 
 def _evict_expired():
     """Remove entries older than TTL."""
+    # Insertion order == time order, so expired entries are all at the front —
+    # stop at the first live one instead of scanning every entry per webhook.
     now = time.time()
-    expired = [k for k, t in _seen.items() if now - t > _TTL_SECONDS]
-    for k in expired:
-        del _seen[k]
+    while _seen:
+        oldest = next(iter(_seen))
+        if now - _seen[oldest] <= _TTL_SECONDS:
+            break
+        del _seen[oldest]
 
     # Also evict oldest if over max size
     while len(_seen) > _MAX_SIZE:
@@ -65,3 +77,26 @@ def is_duplicate(fingerprint: str) -> bool:
 
     _seen[fingerprint] = time.time()
     return False
+
+
+def seen_recently(key: tuple, ttl: int = RECENT_TTL_SECONDS) -> bool:
+    """
+    Returns True if the same logical event key was seen within ttl seconds.
+    Side effect: records key if new. Expired keys are pruned on every call.
+    Thread-safe — called from background handler threads.
+    """
+    now = time.time()
+    with _RECENT_LOCK:
+        # Keys are only added, never refreshed, so the oldest are at the front
+        while _recent:
+            oldest = next(iter(_recent))
+            if now - _recent[oldest] <= ttl:
+                break
+            del _recent[oldest]
+
+        if key in _recent:
+            log.info(f"Coalesced repeat event: {key}")
+            return True
+
+        _recent[key] = now
+        return False
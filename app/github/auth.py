@@ -1,50 +1,121 @@
 """
 GitHub Auth - app/github/auth.py
 JWT generation and installation token caching.
+Tokens are refreshed in the background before they expire, so handlers
+almost never wait on the auth endpoint.
 """
 
 import os
 import time
 import logging
+import threading
+from collections import defaultdict
 import jwt
-import requests
+import orjson
+from cryptography.hazmat.primitives import serialization
+from app.github.client import GITHUB_API, session
 
 log = logging.getLogger(__name__)
 
 APP_ID = os.environ.get("GITHUB_APP_ID", "")
 PRIVATE_KEY = os.environ.get("GITHUB_PRIVATE_KEY", "").replace("\\n", "\n")
 
+TOKEN_TTL = 3000        # 50 min — GitHub tokens live 60 min
+REFRESH_AFTER = 2700    # 45 min — rotate in the background before TTL
+
 _token_cache: dict = {}
+_token_locks: defaultdict = defaultdict(threading.Lock)
+_locks_guard = threading.Lock()
+
+# App JWT is valid ~9 min — reuse it instead of re-signing on every token fetch
+_jwt_cache = {"token": "", "exp": 0}
+_jwt_lock = threading.Lock()
+
+
+def _load_signing_key():
+    """Parse the PEM once at import — jwt.encode would otherwise re-parse it per call."""
+    if not PRIVATE_KEY:
+        return None
+    try:
+        return serialization.load_pem_private_key(PRIVATE_KEY.encode(), password=None)
+    except Exception as e:
+        log.error(f"Could not parse GITHUB_PRIVATE_KEY: {e}")
+        return None
+
+
+_signing_key = _load_signing_key()
 
 
 def get_jwt() -> str:
-    now = int(time.time())
-    payload = {"iat": now - 60, "exp": now + 540, "iss": APP_ID}
-    token = jwt.encode(payload, PRIVATE_KEY, algorithm="RS256")
-    return token if isinstance(token, str) else token.decode("utf-8")
+    """Returns cached App JWT, re-signing only within 1 min of its expiry."""
+    with _jwt_lock:
+        now = int(time.time())
+        if _jwt_cache["exp"] > now + 60:
+            return _jwt_cache["token"]
+
+        exp = now + 540
+        payload = {"iat": now - 60, "exp": exp, "iss": APP_ID}
+        token = jwt.encode(payload, _signing_key or PRIVATE_KEY, algorithm="RS256")
+        token = token if isinstance(token, str) else token.decode("utf-8")
+        _jwt_cache.update(token=token, exp=exp)
+        return token
 
 
 def get_installation_token(installation_id: int) -> str:
-    """Returns cached token or fetches a fresh one."""
+    """Returns cached token or fetches a fresh one (one fetch per installation at a time)."""
     cached = _token_cache.get(installation_id)
     if cached and cached["expires"] > time.time() + 120:
+        cached["used"] = True
         return cached["token"]
 
+    with _lock_for(installation_id):
+        # Another thread may have refreshed while we waited
+        cached = _token_cache.get(installation_id)
+        if cached and cached["expires"] > time.time() + 120:
+            cached["used"] = True
+            return cached["token"]
+        return _fetch_token(installation_id)
+
+
+def _lock_for(installation_id: int) -> threading.Lock:
+    with _locks_guard:
+        return _token_locks[installation_id]
+
+
+def _fetch_token(installation_id: int) -> str:
+    """Mint a new installation token. Caller must hold the installation's lock."""
     app_jwt = get_jwt()
-    r = requests.post(
-        f"https://api.github.com/app/installations/{installation_id}/access_tokens",
-        headers={
-            "Authorization": f"Bearer {app_jwt}",
-            "Accept": "application/vnd.github.v3+json",
-        },
+    r = session.post(
+        f"{GITHUB_API}/app/installations/{installation_id}/access_tokens",
+        headers={"Authorization": f"Bearer {app_jwt}"},
         timeout=15,
     )
     r.raise_for_status()
-    token = r.json()["token"]
+    token = orjson.loads(r.content)["token"]
 
     _token_cache[installation_id] = {
         "token": token,
-        "expires": time.time() + 3000,   # 50 min
+        "expires": time.time() + TOKEN_TTL,
+        "used": False,
     }
     log.info(f"Fetched installation token for {installation_id}")
+    _schedule_refresh(installation_id)
     return token
+
+
+def _schedule_refresh(installation_id: int):
+    timer = threading.Timer(REFRESH_AFTER, _refresh, args=(installation_id,))
+    timer.daemon = True
+    timer.start()
+
+
+def _refresh(installation_id: int):
+    """Background rotation. Idle installations are left to expire instead."""
+    cached = _token_cache.get(installation_id)
+    if not cached or not cached.get("used"):
+        return
+    with _lock_for(installation_id):
+        try:
+            _fetch_token(installation_id)
+        except Exception as e:
+            log.warning(f"Background token refresh failed for {installation_id}: {e}")
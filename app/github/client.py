@@ -1,12 +1,17 @@
 """
 GitHub API Client - app/github/client.py
 All GitHub API calls go through here.
-Features: retry with exponential backoff, rate limit awareness, structured errors.
+Features: retry with exponential backoff, rate limit awareness, structured errors,
+ETag conditional GETs.
 """
 
 import time
 import logging
+import threading
+from collections import OrderedDict
+import orjson
 import requests
+from app.core.http import make_session
 from app.github.rate_limit import update_from_headers, check_and_wait
 
 log = logging.getLogger(__name__)
@@ -15,6 +20,23 @@ GITHUB_API = "https://api.github.com"
 DEFAULT_TIMEOUT = 20
 MAX_RETRIES = 3
 
+# Pooled session — reuses TLS connections to api.github.com across calls
+session = make_session({
+    "Accept": "application/vnd.github.v3+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+})
+
+
+# ETag cache for conditional GETs: {path: (etag, raw_body)}
+# A 304 reply has no body and doesn't count against the rate limit.
+# Raw bytes are kept and re-parsed on a hit, so every caller gets its own
+# object; the cache is capped by total bytes and skips large bodies.
+_etag_cache: OrderedDict = OrderedDict()
+_etag_lock = threading.Lock()
+_etag_bytes = 0
+_ETAG_MAX_BYTES = 2 * 1024 * 1024
+_ETAG_MAX_ENTRY_BYTES = 64 * 1024
+
 
 class GitHubError(Exception):
     def __init__(self, message: str, status_code: int = 0):
@@ -23,17 +45,27 @@ class GitHubError(Exception):
 
 
 def _request(method: str, path: str, token: str, data: dict = None,
-             timeout: int = DEFAULT_TIMEOUT) -> dict:
+             timeout: int = DEFAULT_TIMEOUT, conditional: bool = False,
+             links: dict = None) -> dict:
     """
     Core request method. All public functions call this.
     Handles: retry, rate limit, error parsing, header tracking.
+    conditional=True sends If-None-Match for a previously seen ETag (GET only).
+    links, if given, is filled with the response's parsed Link header.
     """
     url = f"{GITHUB_API}{path}"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Accept": "application/vnd.github.v3+json",
-        "X-GitHub-Api-Version": "2022-11-28",
-    }
+    headers = {"Authorization": f"Bearer {token}"}
+    body = None
+    if data is not None:
+        body = orjson.dumps(data)
+        headers["Content-Type"] = "application/json"
+
+    cached = None
+    if conditional:
+        with _etag_lock:
+            cached = _etag_cache.get(path)
+        if cached:
+            headers["If-None-Match"] = cached[0]
 
     # Check rate limit before every call
     try:
@@ -44,10 +76,10 @@ def _request(method: str, path: str, token: str, data: dict = None,
     last_error = None
     for attempt in range(MAX_RETRIES):
         try:
-            response = requests.request(
+            response = session.request(
                 method, url,
                 headers=headers,
-                json=data,
+                data=body,
                 timeout=timeout
             )
 
@@ -72,10 +104,14 @@ def _request(method: str, path: str, token: str, data: dict = None,
                 )
                 continue
 
+            # 304 Not Modified — serve the body we cached with this ETag
+            if response.status_code == 304 and cached:
+                return orjson.loads(cached[1])
+
             # 4xx client errors — don't retry, raise immediately
             if response.status_code >= 400:
                 try:
-                    msg = response.json().get("message", response.text[:200])
+                    msg = orjson.loads(response.content).get("message", response.text[:200])
                 except Exception:
                     msg = response.text[:200]
                 raise GitHubError(f"GitHub {response.status_code}: {msg}", status_code=response.status_code)
@@ -84,7 +120,12 @@ def _request(method: str, path: str, token: str, data: dict = None,
             if response.status_code == 204:
                 return {}
 
-            return response.json()
+            parsed = orjson.loads(response.content)
+            if links is not None:
+                links.update(response.links)
+            if conditional and response.headers.get("ETag"):
+                _remember_etag(path, response.headers["ETag"], response.content)
+            return parsed
 
         except GitHubError:
             raise
@@ -100,10 +141,40 @@ def _request(method: str, path: str, token: str, data: dict = None,
     raise last_error or GitHubError(f"Failed after {MAX_RETRIES} attempts: {method} {path}")
 
 
+def _remember_etag(path: str, etag: str, raw: bytes):
+    global _etag_bytes
+    with _etag_lock:
+        old = _etag_cache.pop(path, None)
+        if old:
+            _etag_bytes -= len(old[1])
+        if len(raw) > _ETAG_MAX_ENTRY_BYTES:
+            return   # too big to keep — and the old copy is stale now
+        _etag_cache[path] = (etag, raw)
+        _etag_bytes += len(raw)
+        while _etag_bytes > _ETAG_MAX_BYTES:
+            _, (_, evicted) = _etag_cache.popitem(last=False)
+            _etag_bytes -= len(evicted)
+
+
 # ── Public API ────────────────────────────────────────────────────────────────
 
-def gh_get(path: str, token: str) -> dict:
-    return _request("GET", path, token)
+def gh_get(path: str, token: str, conditional: bool = False) -> dict:
+    """GET a resource. conditional=True revalidates a cached copy via ETag."""
+    return _request("GET", path, token, conditional=conditional)
+
+
+def gh_get_paginated(path: str, token: str, per_page: int = 100):
+    """
+    Iterate over every item of a list endpoint, following Link: rel="next".
+    Fetches one page at a time, only as far as the caller consumes.
+    """
+    sep = "&" if "?" in path else "?"
+    path = f"{path}{sep}per_page={per_page}"
+    while path:
+        links = {}
+        yield from _request("GET", path, token, links=links)
+        next_url = links.get("next", {}).get("url", "")
+        path = next_url[len(GITHUB_API):] if next_url.startswith(GITHUB_API) else ""
 
 
 def gh_post(path: str, token: str, data: dict) -> dict:
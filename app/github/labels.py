@@ -0,0 +1,69 @@
+"""
+Label Bootstrap - app/github/labels.py
+Makes sure the bot's labels exist in a repo.
+Remembers which repos are already set up, so steady-state events cost 0 calls.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.github.client import gh_get, gh_post, GitHubError
+
+log = logging.getLogger(__name__)
+
+LABELS = [
+    ("excellence: approved ✅", "0075ca"),
+    ("excellence: needs work 🔧", "e4e669"),
+    ("excellence: critical 🚨", "d93f0b"),
+    ("type: feat ✨", "84b6eb"),
+    ("type: fix 🐛", "fc2929"),
+    ("type: refactor ♻️", "fbca04"),
+    ("type: docs 📚", "c5def5"),
+    ("type: test 🧪", "bfd4f2"),
+    ("priority: high 🔥", "e11d48"),
+    ("priority: medium 📌", "f97316"),
+    ("priority: low 💤", "6b7280"),
+    ("conflict: needs resolution ⚔️", "b60205"),
+    ("bug 🐛", "d73a4a"),
+    ("enhancement ✨", "a2eeef"),
+    ("help wanted 🙏", "008672"),
+    ("good first issue 👋", "7057ff"),
+]
+
+_labels_ensured: set = set()
+_lock = threading.Lock()
+
+
+def ensure_labels(repo: str, token: str):
+    """
+    Create any missing bot labels. First call per repo: 1 GET + N parallel POSTs.
+    Later calls: no API calls at all.
+    """
+    with _lock:
+        if repo in _labels_ensured:
+            return
+
+    existing = {l["name"] for l in gh_get(f"/repos/{repo}/labels?per_page=100", token)}
+    missing = [(name, color) for name, color in LABELS if name not in existing]
+
+    ok = True
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(len(missing), 8)) as ex:
+            results = list(ex.map(lambda lc: _create_label(repo, token, *lc), missing))
+        ok = all(results)
+        log.info(f"[{repo}] Created {sum(results)}/{len(missing)} missing labels")
+
+    if ok:
+        with _lock:
+            _labels_ensured.add(repo)
+
+
+def _create_label(repo: str, token: str, name: str, color: str) -> bool:
+    try:
+        gh_post(f"/repos/{repo}/labels", token, {"name": name, "color": color})
+        return True
+    except GitHubError as e:
+        if e.status_code == 422:
+            return True   # Already exists — created concurrently
+        log.warning(f"[{repo}] Could not create label {name!r}: {e}")
+        return False
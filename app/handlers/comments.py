@@ -10,6 +10,8 @@ from app.github.auth import get_installation_token
 from app.github.client import gh_get, gh_post, gh_put, gh_delete, GitHubError
 from app.ai.client import groq_ask, groq_text
 from app.core.config import load_config
+from app.core.guardrails import check_pr_auto_merge
+from app.core.idempotency import seen_recently
 from app.core.logger import EventLogger
 
 SKIP_AUTHORS = {"dependabot[bot]", "renovate[bot]", "github-actions[bot]", "ai-repo-manager[bot]"}
@@ -17,6 +19,15 @@ SKIP_AUTHORS = {"dependabot[bot]", "renovate[bot]", "github-actions[bot]", "ai-r
 ALL_COMMANDS = ["/fix", "/apply", "/explain", "/improve", "/test", "/docs",
                 "/refactor", "/health", "/version", "/merge"]
 
+# One pass over the comment instead of a .lower() copy + a scan per command.
+# \b rejects e.g. "/fixed"; the lookbehind rejects paths like "src/test".
+_CMD_RE = re.compile(
+    r'(?<!\w)/(' + "|".join(c.lstrip("/") for c in ALL_COMMANDS) + r')\b',
+    re.IGNORECASE
+)
+_CODEBLOCK_RE = re.compile(r'```[\w]*\n([\s\S]*?)\n```')
+_FENCE_RE = re.compile(r'```[\s\S]*?```')
+
 
 def handle(payload: dict):
     action = payload.get("action")
@@ -33,8 +44,13 @@ def handle(payload: dict):
     if author in SKIP_AUTHORS or author.endswith("[bot]"):
         return
 
-    cmd = next((c for c in ALL_COMMANDS if c in body.lower()), None)
-    if not cmd:
+    cmd_match = _CMD_RE.search(body)
+    if not cmd_match:
+        return
+    cmd = f"/{cmd_match.group(1).lower()}"
+
+    # Same command + text posted twice in quick succession → answer once
+    if seen_recently(("issue_comment", repo, issue_number, cmd, body.strip())):
         return
 
     log = EventLogger("comments", repo=repo)
@@ -59,16 +75,16 @@ def handle(payload: dict):
 
     # Get issue/PR context
     try:
-        issue = gh_get(f"/repos/{repo}/issues/{issue_number}", token)
+        issue = gh_get(f"/repos/{repo}/issues/{issue_number}", token, conditional=True)
         ctx_title = issue.get("title", "")
         ctx_body = issue.get("body", "") or ""
     except Exception:
         ctx_title, ctx_body = "", ""
 
     # Extract code block from comment if present
-    code_match = re.search(r'```[\w]*\n([\s\S]*?)\n```', body)
+    code_match = _CODEBLOCK_RE.search(body)
     code = code_match.group(1) if code_match else ""
-    context_text = re.sub(r'```[\s\S]*?```', '', body).replace(cmd, "").strip()
+    context_text = _FENCE_RE.sub('', body).replace(cmd_match.group(0), "").strip()
     full_context = code or context_text or ctx_body or ctx_title
 
     # Route to command handler
@@ -127,6 +143,7 @@ Return JSON:
   "explanation": "why this fix works",
   "test": "test to verify fix"
 }}""",
+        max_tokens=1500,
         fast=True
     )
     return (
@@ -185,6 +202,7 @@ Return JSON:
 }}
 
 Only include commits that need fixing. If all are conventional, return empty list.""",
+            max_tokens=1500,
             fast=True
         )
 
@@ -295,7 +313,8 @@ Only include commits that need fixing. If all are conventional, return empty lis
 def _cmd_explain(context: str) -> str:
     text = groq_text(
         "Senior engineer and teacher. Explain clearly in plain English.",
-        f"Explain this:\n{context[:2000]}"
+        f"Explain this:\n{context[:2000]}",
+        complex=True
     )
     return f"## 💡 Explanation\n\n{text}"
 
@@ -317,6 +336,7 @@ Return JSON:
     }}
   ]
 }}""",
+        max_tokens=1500,
         fast=True
     )
     lines = [f"## ✨ Improvements\n\n**{r.get('summary', '')}**\n"]
@@ -345,6 +365,7 @@ Return JSON:
     }}
   ]
 }}""",
+        max_tokens=1500,
         fast=True
     )
     tests = r.get("tests", [])
@@ -370,6 +391,7 @@ Return JSON:
   "usage": "usage example",
   "readme_section": "markdown section for README"
 }}""",
+        max_tokens=1500,
         fast=True
     )
     return (
@@ -401,7 +423,8 @@ Return JSON:
       "benefit": "concrete benefit"
     }}
   ]
-}}"""
+}}""",
+        max_tokens=1500
     )
     lines = [
         f"## ♻️ Refactor Suggestions\n\n"
@@ -612,7 +635,6 @@ def _cmd_merge(repo: str, issue_number: int, issue: dict,
         checks = check_runs.get("check_runs", [])
 
         # Run guardrails
-        from app.core.guardrails import check_pr_auto_merge
         guard = check_pr_auto_merge(pr, checks, reviews, config)
 
         if not guard.passed:
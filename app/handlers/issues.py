@@ -3,15 +3,33 @@ Issues Handler - app/handlers/issues.py
 """
 
 from app.github.auth import get_installation_token
+from app.github.labels import ensure_labels
 from app.github.client import gh_get, gh_post, GitHubError
 from app.ai.client import groq_ask
 from app.ai.validator import validate_issue_triage
 from app.core.config import load_config
 from app.core.guardrails import check_auto_label
+from app.core.idempotency import seen_recently
 from app.core.logger import EventLogger
 
 SKIP_AUTHORS = {"dependabot[bot]", "renovate[bot]", "github-actions[bot]", "ai-repo-manager[bot]"}
 
+# Stable instructions first, issue data last — shared prompt prefix across calls
+_TRIAGE_SYSTEM = "You are an expert open source maintainer. Triage issues. Return valid JSON only."
+
+_TRIAGE_INSTRUCTIONS = """Triage the issue described under ISSUE DATA.
+
+Return JSON:
+{
+  "type": "bug|feature|question|docs|performance|security",
+  "priority": "high|medium|low",
+  "labels": ["bug 🐛"],
+  "welcome": "warm 2-sentence response",
+  "needs_info": false,
+  "questions": ["clarifying question if needed"],
+  "complexity": "trivial|simple|moderate|complex"
+}"""
+
 
 def handle(payload: dict):
     action = payload.get("action")
@@ -32,6 +50,9 @@ def handle(payload: dict):
     if author in SKIP_AUTHORS:
         return
 
+    if seen_recently(("issues", repo, issue_number, action)):
+        return
+
     log.info(f"Issue #{issue_number} opened by @{author}")
 
     try:
@@ -47,29 +68,21 @@ def handle(payload: dict):
 
     if config.get("labels", "auto_create", default=True):
         try:
-            _ensure_labels(repo, token)
+            ensure_labels(repo, token)
         except Exception:
             pass
 
     # AI triage
     raw = groq_ask(
-        "You are an expert open source maintainer. Triage issues. Return valid JSON only.",
-        f"""Triage this issue:
+        _TRIAGE_SYSTEM,
+        f"""{_TRIAGE_INSTRUCTIONS}
+
+ISSUE DATA:
 Repo: {repo}
 Title: {issue.get('title', '')}
 Author: {author}
-Body: {(issue.get('body') or '')[:1500] or '(empty)'}
-
-Return JSON:
-{{
-  "type": "bug|feature|question|docs|performance|security",
-  "priority": "high|medium|low",
-  "labels": ["bug 🐛"],
-  "welcome": "warm 2-sentence response",
-  "needs_info": false,
-  "questions": ["clarifying question if needed"],
-  "complexity": "trivial|simple|moderate|complex"
-}}"""
+Body: {(issue.get('body') or '')[:1500] or '(empty)'}""",
+        fast=True
     )
 
     result = validate_issue_triage(raw)
@@ -118,21 +131,3 @@ Return JSON:
         log.done(f"Issue #{issue_number} triaged as {result['type']}/{priority}")
     except GitHubError as e:
         log.error(f"Could not post comment: {e}")
-
-
-def _ensure_labels(repo: str, token: str):
-    LABELS = [
-        ("excellence: approved ✅", "0075ca"), ("excellence: needs work 🔧", "e4e669"),
-        ("excellence: critical 🚨", "d93f0b"), ("type: feat ✨", "84b6eb"),
-        ("type: fix 🐛", "fc2929"), ("type: refactor ♻️", "fbca04"),
-        ("type: docs 📚", "c5def5"), ("type: test 🧪", "bfd4f2"),
-        ("priority: high 🔥", "e11d48"), ("priority: medium 📌", "f97316"),
-        ("priority: low 💤", "6b7280"), ("bug 🐛", "d73a4a"),
-        ("enhancement ✨", "a2eeef"), ("help wanted 🙏", "008672"),
-        ("good first issue 👋", "7057ff"),
-    ]
-    for name, color in LABELS:
-        try:
-            gh_post(f"/repos/{repo}/labels", token, {"name": name, "color": color})
-        except Exception:
-            pass
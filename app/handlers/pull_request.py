@@ -4,20 +4,134 @@ Handles pull_request webhook events.
 Uses: config, guardrails, idempotency, structured logging, AI validation.
 """
 
+import io
 import time
+import hashlib
 import logging
+import threading
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from app.github.auth import get_installation_token
+from app.github.labels import ensure_labels
 from app.github.client import gh_get, gh_post, gh_patch, gh_put, gh_delete, GitHubError
-from app.ai.client import groq_ask, groq_text
+from app.ai.client import groq_ask, groq_ask_stream, groq_text
 from app.ai.validator import validate_pr_analysis, validate_code_review
 from app.core.config import load_config
 from app.core.guardrails import (
     check_pr_auto_merge, check_title_update,
     check_description_update, check_auto_label
 )
+from app.core.idempotency import seen_recently
 from app.core.logger import EventLogger
 
 SKIP_AUTHORS = {"dependabot[bot]", "renovate[bot]", "github-actions[bot]", "ai-repo-manager[bot]"}
+REVIEW_WORKERS = 4             # concurrent per-file AI review calls (fallback path)
+REVIEW_PROMPT_BUDGET = 6000    # max patch chars sent in one batched review
+REVIEW_PATCH_CHARS = 1500      # max patch chars sent per file
+
+# Shared pool for overlapping independent GitHub calls within one event
+_io_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="pr-io")
+
+# Code reviews keyed by (filename, sha256(patch)) — an unchanged patch is
+# never sent to the AI twice (e.g. a PR reopened without new commits).
+# Only reviews of a complete, non-empty patch are stored.
+_review_cache: OrderedDict = OrderedDict()
+_review_cache_lock = threading.Lock()
+REVIEW_CACHE_SIZE = 512
+
+
+# ── Prompts ──────────────────────────────────────────────────────────────────
+# Stable instructions + schema come first and per-event data last, so every
+# call of one type shares the same prompt prefix (Groq can reuse its KV cache).
+
+_PR_SYSTEM = "You are a principal engineer. Analyze PRs and respond with valid JSON only — no markdown."
+
+_PR_INSTRUCTIONS = """Analyze the PR described under PR DATA.
+
+Return JSON:
+{
+  "improved_title": "conventional commit title",
+  "description": "## 📋 Summary\\n...\\n\\n## 🔄 Changes\\n- ...\\n\\n## 🧪 Testing\\n- ...\\n\\n## ✅ Checklist\\n- [ ] Tests added\\n- [ ] Docs updated\\n- [ ] Self-reviewed",
+  "labels": ["type: feat ✨"],
+  "risk_level": "low",
+  "risk_reason": "why",
+  "reviewer_focus": "what to review",
+  "pr_type": "feat"
+}"""
+
+_REVIEW_SYSTEM = "You are a senior engineer. Review code changes. Return valid JSON only."
+
+_REVIEW_INSTRUCTIONS = """Review the code change under CHANGE.
+
+Return JSON:
+{
+  "score": 7,
+  "verdict": "one line",
+  "issues": [{"severity": "major", "issue": "...", "fix": "..."}],
+  "positives": ["..."],
+  "refactor_opportunity": "optional improvement without behavior change"
+}"""
+
+_BATCH_REVIEW_INSTRUCTIONS = """Review each file change listed under FILES.
+
+Return JSON with exactly one review per file:
+{
+  "reviews": [
+    {
+      "file": "path/from/input",
+      "score": 7,
+      "verdict": "one line",
+      "issues": [{"severity": "major", "issue": "...", "fix": "..."}],
+      "positives": ["..."],
+      "refactor_opportunity": "optional improvement without behavior change"
+    }
+  ]
+}"""
+
+# ── Comment templates ────────────────────────────────────────────────────────
+# Rendered with format_map over a ChainMap onto _COMMENT_DEFAULTS, so a
+# missing value falls back to a default instead of raising KeyError.
+
+_PR_COMMENT_TMPL = """## 🚀 AI Repo Manager — PR Analysis
+
+| | |
+|---|---|
+| **Risk** | {risk_emoji} {risk_title} — {risk_reason} |
+| **Type** | `{pr_type}` |
+| **Files** | {file_count} changed |
+| **Review Focus** | {reviewer_focus} |
+{update_note}
+
+💡 *Commands: `/fix` `/explain` `/improve` `/test` `/docs` `/refactor` `/health`*
+{footer}"""
+
+_REVIEW_COMMENT_TMPL = """## 🧠 AI Code Review
+
+**Score: {avg:.1f}/10** `{score_bar}` — {verdict}
+
+| File | Score | Verdict |
+|------|-------|---------|
+{file_table}
+{issues_md}
+{refactor_md}
+{footer}"""
+
+_COMMENT_DEFAULTS = {
+    "risk_emoji": "🟡",
+    "risk_title": "Medium",
+    "risk_reason": "",
+    "pr_type": "chore",
+    "file_count": 0,
+    "reviewer_focus": "General review",
+    "update_note": "",
+    "avg": 0.0,
+    "score_bar": "░" * 10,
+    "verdict": "",
+    "file_table": "",
+    "issues_md": "",
+    "refactor_md": "",
+    "footer": "",
+}
 
 
 def handle(payload: dict):
@@ -36,6 +150,9 @@ def handle(payload: dict):
     if action not in ("opened", "reopened"):
         return
 
+    if seen_recently(("pull_request", repo, pr_number, action)):
+        return
+
     log.info(f"PR #{pr_number} {action} by @{author}")
 
     try:
@@ -51,77 +168,73 @@ def handle(payload: dict):
         log.info("PR handling disabled in config — skipping")
         return
 
-    # Ensure labels exist (non-blocking)
+    # Changed files are fetched alongside ensure_labels below
+    files_future = _io_pool.submit(
+        gh_get, f"/repos/{repo}/pulls/{pr_number}/files?per_page=100", token)
+
+    # Ensure labels exist (non-blocking) — runs alongside the AI analysis below
+    labels_future = None
     if config.get("labels", "auto_create", default=True):
-        try:
-            _ensure_labels(repo, token)
-        except Exception:
-            pass
+        labels_future = _io_pool.submit(ensure_labels, repo, token)
 
     # Get changed files
     files = []
     try:
-        files = gh_get(f"/repos/{repo}/pulls/{pr_number}/files", token)
-        file_names = [f["filename"] for f in files[:15]]
-        patches = {f["filename"]: f.get("patch", "")[:800] for f in files[:5]}
+        files = files_future.result()
     except GitHubError as e:
         log.warning(f"Could not fetch PR files: {e}")
-        file_names, patches = [], {}
-
-    # AI Analysis
-    raw_result = groq_ask(
-        "You are a principal engineer. Analyze PRs and respond with valid JSON only — no markdown.",
-        f"""Analyze this PR:
-Title: {pr.get('title', '')}
-Branch: {pr['head']['ref']} → {pr['base']['ref']}
-Author: {author}
-Body: {(pr.get('body') or '')[:500]}
-Files:\n{chr(10).join(file_names) or 'unknown'}
-Patches:\n{chr(10).join(f'# {k}{chr(10)}{v}' for k, v in patches.items())[:2000]}
 
-Return JSON:
-{{
-  "improved_title": "conventional commit title",
-  "description": "## 📋 Summary\\n...\\n\\n## 🔄 Changes\\n- ...\\n\\n## 🧪 Testing\\n- ...\\n\\n## ✅ Checklist\\n- [ ] Tests added\\n- [ ] Docs updated\\n- [ ] Self-reviewed",
-  "labels": ["type: feat ✨"],
-  "risk_level": "low",
-  "risk_reason": "why",
-  "reviewer_focus": "what to review",
-  "pr_type": "feat"
-}}"""
-    )
-
-    # Validate AI response — never trust raw output
-    result = validate_pr_analysis(raw_result)
+    files_str, patches_str = _summarize_files(files)
 
-    # Guardrail: should we update title?
-    title_guard = check_title_update(pr.get("title", ""), result["improved_title"], config)
+    # Guardrail: description only depends on the current PR body
     desc_guard = check_description_update(pr.get("body", "") or "", config)
 
-    patch_data = {}
-    if title_guard.passed:
-        patch_data["title"] = result["improved_title"]
-        log.info(f"Updating PR title: {result['improved_title'][:60]}")
-    else:
-        log.debug(f"Title update skipped: {title_guard.reason}")
+    # AI Analysis — streamed, so GitHub updates start as soon as their fields close
+    fields = {}
+    pending = []
+    patch_data = None
+    labels_sent = False
 
-    if desc_guard.passed and result["description"]:
-        patch_data["body"] = result["description"]
+    for key, value in groq_ask_stream(
+        _PR_SYSTEM,
+        f"""{_PR_INSTRUCTIONS}
 
-    if patch_data:
+PR DATA:
+Title: {pr.get('title', '')}
+Branch: {pr['head']['ref']} → {pr['base']['ref']}
+Author: {author}
+Body: {(pr.get('body') or '')[:500]}
+Files:\n{files_str or 'unknown'}
+Patches:\n{patches_str}""",
+        max_tokens=1000,
+        fast=True
+    ):
+        fields[key] = value
+        # Validate AI response — never trust raw output
+        result = validate_pr_analysis(fields)
+
+        # Title + description arrive first — send them as one PATCH
+        if patch_data is None and "improved_title" in fields and (
+                "description" in fields or not desc_guard.passed):
+            patch_data = _start_pr_update(repo, pr_number, token, pr, result,
+                                          desc_guard, config, pending, log)
+
+        if key == "labels" and not labels_sent:
+            labels_sent = True
+            _start_labels(repo, pr_number, token, pr, result, labels_future, config, pending)
+
+    result = validate_pr_analysis(fields)
+    if patch_data is None:
+        patch_data = _start_pr_update(repo, pr_number, token, pr, result,
+                                      desc_guard, config, pending, log)
+    if not labels_sent:
+        _start_labels(repo, pr_number, token, pr, result, labels_future, config, pending)
+
+    for what, fut in pending:
         try:
-            gh_patch(f"/repos/{repo}/pulls/{pr_number}", token, patch_data)
+            fut.result()
         except GitHubError as e:
-            log.warning(f"Could not update PR: {e}")
-
-    # Guardrail: labels
-    label_guard = check_auto_label(pr, result["labels"], config)
-    if label_guard.passed:
-        try:
-            gh_post(f"/repos/{repo}/issues/{pr_number}/labels", token,
-                   {"labels": result["labels"]})
-        except GitHubError:
-            pass
+            log.warning(f"Could not {what}: {e}")
 
     # Post analysis comment
     risk = result["risk_level"]
@@ -131,18 +244,16 @@ Return JSON:
         updated = "title + description" if "body" in patch_data else "title"
         update_note = f"\n\n> 📝 Auto-improved: {updated}"
 
-    comment = f"""## 🚀 AI Repo Manager — PR Analysis
-
-| | |
-|---|---|
-| **Risk** | {risk_emoji} {risk.capitalize()} — {result['risk_reason']} |
-| **Type** | `{result['pr_type']}` |
-| **Files** | {len(file_names)} changed |
-| **Review Focus** | {result['reviewer_focus']} |
-{update_note}
-
-💡 *Commands: `/fix` `/explain` `/improve` `/test` `/docs` `/refactor` `/health`*
-{config.footer}"""
+    comment = _PR_COMMENT_TMPL.format_map(ChainMap({
+        "risk_emoji": risk_emoji,
+        "risk_title": risk.capitalize(),
+        "risk_reason": result["risk_reason"],
+        "pr_type": result["pr_type"],
+        "file_count": min(len(files), 15),
+        "reviewer_focus": result["reviewer_focus"],
+        "update_note": update_note,
+        "footer": config.footer,
+    }, _COMMENT_DEFAULTS))
 
     try:
         gh_post(f"/repos/{repo}/issues/{pr_number}/comments", token, {"body": comment})
@@ -174,30 +285,28 @@ def _run_code_review(repo: str, pr_number: int, token: str, files: list, config)
     if not reviewable:
         return
 
-    reviews = []
-    for f in reviewable:
-        fname = f["filename"]
-        patch = f.get("patch", "")[:1500]
-        raw = groq_ask(
-            "You are a senior engineer. Review code changes. Return valid JSON only.",
-            f"""Review this change:
-File: {fname}
-Patch:\n{patch}
-
-Return JSON:
-{{
-  "score": 7,
-  "verdict": "one line",
-  "issues": [{{"severity": "major", "issue": "...", "fix": "..."}}],
-  "positives": ["..."],
-  "refactor_opportunity": "optional improvement without behavior change"
-}}""",
-            max_tokens=800,
-            fast=True
-        )
-        validated = validate_code_review(raw)
-        if validated["score"] is not None:
-            reviews.append((fname, validated))
+    # Unchanged patches reuse their cached review; the rest go to one batched
+    # AI call, and anything it misses is reviewed per-file
+    keys = [_review_key(f) for f in reviewable]
+    results = [_cached_review(k) for k in keys]
+    todo = [i for i, r in enumerate(results) if r is None]
+    if todo:
+        for i, r in zip(todo, _review_batch([reviewable[i] for i in todo])):
+            results[i] = r
+        missing = [i for i in todo if results[i] is None]
+        if missing:
+            log.info(f"Batch review incomplete — falling back for {len(missing)} file(s)")
+            _review_files_concurrently(reviewable, results, missing, log)
+        for i in todo:
+            if keys[i] is not None and results[i] is not None and results[i]["score"] is not None:
+                _remember_review(keys[i], results[i])
+    if len(todo) < len(reviewable):
+        log.info(f"Reused cached review for {len(reviewable) - len(todo)} file(s)")
+
+    reviews = [
+        (f["filename"], r) for f, r in zip(reviewable, results)
+        if r is not None and r["score"] is not None
+    ]
 
     if not reviews:
         return
@@ -228,16 +337,15 @@ Return JSON:
         for fname, r in reviews
     )
 
-    comment = f"""## 🧠 AI Code Review
-
-**Score: {avg:.1f}/10** `{score_bar}` — {verdict}
-
-| File | Score | Verdict |
-|------|-------|---------|
-{file_table}
-{issues_md or chr(10) + "No major issues found ✅"}
-{refactor_md}
-{config.footer}"""
+    comment = _REVIEW_COMMENT_TMPL.format_map(ChainMap({
+        "avg": avg,
+        "score_bar": score_bar,
+        "verdict": verdict,
+        "file_table": file_table,
+        "issues_md": issues_md or "\nNo major issues found ✅",
+        "refactor_md": refactor_md,
+        "footer": config.footer,
+    }, _COMMENT_DEFAULTS))
 
     gh_post(f"/repos/{repo}/issues/{pr_number}/comments", token, {"body": comment})
 
@@ -248,27 +356,163 @@ Return JSON:
     log.done(f"Code review done for PR #{pr_number}")
 
 
-def _ensure_labels(repo: str, token: str):
-    LABELS = [
-        ("excellence: approved ✅", "0075ca"),
-        ("excellence: needs work 🔧", "e4e669"),
-        ("excellence: critical 🚨", "d93f0b"),
-        ("type: feat ✨", "84b6eb"),
-        ("type: fix 🐛", "fc2929"),
-        ("type: refactor ♻️", "fbca04"),
-        ("type: docs 📚", "c5def5"),
-        ("type: test 🧪", "bfd4f2"),
-        ("priority: high 🔥", "e11d48"),
-        ("priority: medium 📌", "f97316"),
-        ("priority: low 💤", "6b7280"),
-        ("conflict: needs resolution ⚔️", "b60205"),
-        ("bug 🐛", "d73a4a"),
-        ("enhancement ✨", "a2eeef"),
-        ("help wanted 🙏", "008672"),
-        ("good first issue 👋", "7057ff"),
-    ]
-    for name, color in LABELS:
-        try:
-            gh_post(f"/repos/{repo}/labels", token, {"name": name, "color": color})
-        except Exception:
-            pass
+def _summarize_files(files: list) -> tuple:
+    """
+    Single pass over the PR files for the analysis prompt.
+    Returns (up to 15 file names, up to 5 patches of 800 chars, 2000 chars total).
+    Patches are only sliced, never copied whole — GitHub can send MBs per file.
+    """
+    names = io.StringIO()
+    patches = io.StringIO()
+    budget = 2000
+    for i, f in enumerate(files[:15]):
+        if i:
+            names.write("\n")
+        names.write(f["filename"])
+        if i < 5 and budget > 0:
+            chunk = f"# {f['filename']}\n{(f.get('patch') or '')[:800]}\n"[:budget]
+            patches.write(chunk)
+            budget -= len(chunk)
+    return names.getvalue(), patches.getvalue()
+
+
+def _start_pr_update(repo: str, pr_number: int, token: str, pr: dict, result: dict,
+                     desc_guard, config, pending: list, log) -> dict:
+    """Apply title/description guardrails and start the PATCH. Returns patch_data."""
+    title_guard = check_title_update(pr.get("title", ""), result["improved_title"], config)
+
+    patch_data = {}
+    if title_guard.passed:
+        patch_data["title"] = result["improved_title"]
+        log.info(f"Updating PR title: {result['improved_title'][:60]}")
+    else:
+        log.debug(f"Title update skipped: {title_guard.reason}")
+
+    if desc_guard.passed and result["description"]:
+        patch_data["body"] = result["description"]
+
+    if patch_data:
+        pending.append(("update PR", _io_pool.submit(
+            gh_patch, f"/repos/{repo}/pulls/{pr_number}", token, patch_data)))
+    return patch_data
+
+
+def _start_labels(repo: str, pr_number: int, token: str, pr: dict, result: dict,
+                  labels_future, config, pending: list):
+    """Apply the label guardrail and start the label POST in the background."""
+    label_guard = check_auto_label(pr, result["labels"], config)
+    if not label_guard.passed:
+        return
+    pending.append(("add labels", _io_pool.submit(
+        _add_labels, repo, pr_number, token, result["labels"], labels_future)))
+
+
+def _add_labels(repo: str, pr_number: int, token: str, labels: list, labels_future):
+    """POST labels once ensure_labels (if started) has finished — runs in _io_pool
+    so the caller keeps reading the AI stream meanwhile."""
+    if labels_future is not None:
+        _wait_quietly(labels_future)
+    return gh_post(f"/repos/{repo}/issues/{pr_number}/labels", token, {"labels": labels})
+
+
+def _wait_quietly(future):
+    """Block until a best-effort background call finishes, ignoring its errors."""
+    try:
+        future.result()
+    except Exception:
+        pass
+
+
+def _review_key(f: dict):
+    """
+    Cache key for a file's review, or None if its review can't be cached:
+    an empty patch, or one longer than REVIEW_PATCH_CHARS (the model only
+    sees a prefix of it). Oversize patches are never hashed.
+    """
+    patch = f.get("patch", "")
+    if not 0 < len(patch) <= REVIEW_PATCH_CHARS:
+        return None
+    return f["filename"], hashlib.sha256(patch.encode()).hexdigest()
+
+
+def _cached_review(key):
+    """Return the cached review for this key, or None."""
+    if key is None:
+        return None
+    with _review_cache_lock:
+        review = _review_cache.get(key)
+        if review is not None:
+            _review_cache.move_to_end(key)
+        return review
+
+
+def _remember_review(key: tuple, review: dict):
+    with _review_cache_lock:
+        _review_cache[key] = review
+        _review_cache.move_to_end(key)
+        while len(_review_cache) > REVIEW_CACHE_SIZE:
+            _review_cache.popitem(last=False)
+
+
+def _review_files_concurrently(reviewable: list, results: list, indexes: list, log):
+    """Review reviewable[i] for each i in indexes in parallel, filling results in place."""
+    with ThreadPoolExecutor(max_workers=min(len(indexes), REVIEW_WORKERS)) as ex:
+        futures = {ex.submit(_review_file, reviewable[i]): i for i in indexes}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                log.warning(f"Review of {reviewable[i]['filename']} failed: {e}")
+
+
+def _review_batch(reviewable: list) -> list:
+    """
+    Review all files in a single AI call.
+    Returns one validated review per file (same order), None where the batch
+    response had nothing usable for that file. Files that don't fit in what
+    is left of REVIEW_PROMPT_BUDGET are not sent and come back as None, so no
+    patch is cut shorter than it would be in a per-file review.
+    """
+    budget = REVIEW_PROMPT_BUDGET
+    sections = []
+    for f in reviewable:
+        patch = f.get("patch", "")[:REVIEW_PATCH_CHARS]
+        if len(patch) > budget:
+            break
+        budget -= len(patch)
+        sections.append(f"File: {f['filename']}\nPatch:\n{patch}")
+
+    raw = groq_ask(
+        _REVIEW_SYSTEM,
+        f"{_BATCH_REVIEW_INSTRUCTIONS}\n\nFILES:\n\n" + "\n\n".join(sections),
+        max_tokens=400 * len(sections),
+        fast=True
+    )
+
+    by_file = {}
+    batch = raw.get("reviews") if isinstance(raw, dict) else None
+    if isinstance(batch, list):
+        for item in batch:
+            if isinstance(item, dict) and item.get("file"):
+                by_file[str(item["file"])] = item
+
+    results = []
+    for f in reviewable[:len(sections)]:
+        item = by_file.get(f["filename"])
+        validated = validate_code_review(item) if item else None
+        results.append(validated if validated and validated["score"] is not None else None)
+    return results + [None] * (len(reviewable) - len(sections))
+
+
+def _review_file(f: dict) -> dict:
+    """Ask the AI to review a single file's patch. Returns validated review."""
+    fname = f["filename"]
+    patch = f.get("patch", "")[:REVIEW_PATCH_CHARS]
+    raw = groq_ask(
+        _REVIEW_SYSTEM,
+        f"{_REVIEW_INSTRUCTIONS}\n\nCHANGE:\nFile: {fname}\nPatch:\n{patch}",
+        max_tokens=400,
+        fast=True
+    )
+    return validate_code_review(raw)
@@ -3,24 +3,21 @@ Push Handler - app/handlers/push.py
 Handles push webhook events — enforces conventional commits.
 """
 
-import re
 import logging
 from app.github.auth import get_installation_token
 from app.github.client import gh_post, GitHubError
 from app.core.config import load_config
+from app.core.guardrails import CONVENTIONAL
+from app.core.idempotency import seen_recently
 from app.core.logger import EventLogger
 
 SKIP_AUTHORS = {"dependabot[bot]", "renovate[bot]", "github-actions[bot]"}
 
-CONVENTIONAL = re.compile(
-    r'^(feat|fix|docs|style|refactor|perf|test|chore|ci|build|revert)(\(.+\))?(!)?: .+',
-    re.IGNORECASE
-)
-
 
 def handle(payload: dict):
+    # Exact branch refs only — tags, merge refs and e.g. "feature/main-x" are skipped
     ref = payload.get("ref", "")
-    if not any(b in ref for b in ["/main", "/master"]):
+    if ref not in ("refs/heads/main", "refs/heads/master"):
         return
 
     commits = payload.get("commits", [])
@@ -30,8 +27,25 @@ def handle(payload: dict):
     if not installation_id or not commits:
         return
 
+    # Find non-conventional commits — pure CPU, done before any API call
+    bad = [
+        (c["id"][:7], c["message"].split("\n")[0])
+        for c in commits[:10]
+        if not CONVENTIONAL.match(c["message"].split("\n")[0])
+        and not c["message"].startswith("Merge")
+        and c.get("author", {}).get("name", "") not in SKIP_AUTHORS
+    ]
+
     log = EventLogger("push", repo=repo)
 
+    # Routine push — no token, no config fetch
+    if not bad:
+        log.info(f"All {len(commits)} commits follow convention ✅")
+        return
+
+    if seen_recently(("push", repo, ref, payload.get("after", ""))):
+        return
+
     try:
         token = get_installation_token(installation_id)
     except Exception as e:
@@ -46,19 +60,6 @@ def handle(payload: dict):
     if not config.get("push", "enforce_conventional_commits", default=True):
         return
 
-    # Find non-conventional commits
-    bad = [
-        (c["id"][:7], c["message"].split("\n")[0])
-        for c in commits[:10]
-        if not CONVENTIONAL.match(c["message"].split("\n")[0])
-        and not c["message"].startswith("Merge")
-        and c.get("author", {}).get("name", "") not in SKIP_AUTHORS
-    ]
-
-    if not bad:
-        log.info(f"All {len(commits)} commits follow convention ✅")
-        return
-
     threshold = config.get("push", "create_issue_threshold", default=3)
     log.info(f"{len(bad)} non-conventional commits — threshold is {threshold}")
 
@@ -1,6 +1,7 @@
 """
 server.py — Flask entry point.
-This file ONLY does: routing, signature verification, idempotency check.
+This file ONLY does: routing, signature verification, idempotency check,
+and handing events to a background worker pool.
 All business logic lives in app/handlers/*.
 """
 
@@ -9,10 +10,14 @@ import hmac
 import hashlib
 import logging
 import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from flask import Flask, request, jsonify
 
 from app.core.logger import setup_logging
 from app.core.idempotency import make_fingerprint, is_duplicate
+from app.core.metrics import metrics
+from app.handlers import pull_request, issues, comments, push
 
 setup_logging()
 log = logging.getLogger(__name__)
@@ -21,6 +26,20 @@ app = Flask(__name__)
 
 WEBHOOK_SECRET = os.environ.get("GITHUB_WEBHOOK_SECRET", "").encode()
 
+# Handlers make several blocking GitHub + Groq calls (tens of seconds total).
+# They run here so the webhook can ack GitHub well inside its 10s timeout.
+EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="webhook")
+
+HANDLERS = {
+    "pull_request": pull_request.handle,
+    "issues": issues.handle,
+    "issue_comment": comments.handle,
+    "push": push.handle,
+}
+
+_pending = 0
+_pending_lock = threading.Lock()
+
 
 def _verify_signature(payload_bytes: bytes, signature: str) -> bool:
     """Verify GitHub webhook HMAC signature."""
@@ -29,8 +48,12 @@ def _verify_signature(payload_bytes: bytes, signature: str) -> bool:
         return True
     if not signature or not signature.startswith("sha256="):
         return False
-    expected = "sha256=" + hmac.new(WEBHOOK_SECRET, payload_bytes, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(expected, signature)
+    try:
+        received = bytes.fromhex(signature[7:])
+    except ValueError:
+        return False
+    expected = hmac.new(WEBHOOK_SECRET, payload_bytes, hashlib.sha256).digest()
+    return hmac.compare_digest(expected, received)
 
 
 @app.route("/", methods=["GET"])
@@ -38,6 +61,14 @@ def health():
     return jsonify({"app": "AI Repo Manager", "status": "running", "version": "2.0.0"})
 
 
+@app.route("/health", methods=["GET"])
+def health_check():
+    """Liveness + number of events queued or running in the background."""
+    with _pending_lock:
+        depth = _pending
+    return jsonify({"status": "ok", "queue_depth": depth})
+
+
 @app.route("/metrics", methods=["GET"])
 def get_metrics():
     """Observability endpoint — shows system activity counters."""
@@ -54,8 +85,10 @@ def webhook():
 
     # 2. Parse payload
     try:
-        payload = request.get_json(force=True)
-    except Exception:
+        payload = orjson.loads(request.data)
+    except orjson.JSONDecodeError:
+        return jsonify({"error": "Invalid JSON"}), 400
+    if not isinstance(payload, dict):
         return jsonify({"error": "Invalid JSON"}), 400
 
     event_type = request.headers.get("X-GitHub-Event", "")
@@ -69,36 +102,38 @@ def webhook():
     if is_duplicate(fingerprint):
         return jsonify({"status": "duplicate — skipped"}), 200
 
-    # 4. Dispatch to handler
-    try:
-        _dispatch(event_type, payload)
-    except Exception as e:
-        log.error(f"Handler error [{event_type}] {repo}: {e}", exc_info=True)
-        return jsonify({"status": "error", "detail": str(e)[:200]}), 200
-
-    return jsonify({"status": "ok"}), 200
-
+    # 4. Hand off to background worker — ack GitHub immediately
+    handler = HANDLERS.get(event_type)
+    if handler is None:
+        log.debug(f"Unhandled event type: {event_type}")
+        return jsonify({"status": "ignored"}), 200
 
-def _dispatch(event_type: str, payload: dict):
-    """Route event to the correct handler module."""
-    if event_type == "pull_request":
-        from app.handlers.pull_request import handle
-        handle(payload)
+    _enqueue(event_type, handler, payload)
+    return jsonify({"status": "queued"}), 200
 
-    elif event_type == "issues":
-        from app.handlers.issues import handle
-        handle(payload)
 
-    elif event_type == "issue_comment":
-        from app.handlers.comments import handle
-        handle(payload)
+def _enqueue(event_type: str, handler, payload: dict):
+    """Submit a handler to the background executor and track queue depth."""
+    global _pending
+    with _pending_lock:
+        _pending += 1
+    metrics.increment(f"events.{event_type}.queued")
+    EXECUTOR.submit(_run_handler, event_type, handler, payload)
 
-    elif event_type == "push":
-        from app.handlers.push import handle
-        handle(payload)
 
-    else:
-        log.debug(f"Unhandled event type: {event_type}")
+def _run_handler(event_type: str, handler, payload: dict):
+    """Run a handler off the request thread. Never raises."""
+    global _pending
+    repo = payload.get("repository", {}).get("full_name", "unknown")
+    try:
+        handler(payload)
+        metrics.increment(f"events.{event_type}.processed")
+    except Exception as e:
+        metrics.increment(f"events.{event_type}.failed")
+        log.error(f"Handler error [{event_type}] {repo}: {e}", exc_info=True)
+    finally:
+        with _pending_lock:
+            _pending -= 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+tests/test_ai_client.py
+Unit tests for the Groq client's error handling.
+The HTTP session is stubbed — no network calls, no Groq API key needed.
+
+Run: python -m pytest tests/test_ai_client.py -v
+"""
+
+import orjson
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai import client
+from app.ai.client import groq_ask, PRIMARY_MODEL, FALLBACK_MODEL
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: dict):
+        self.status_code = status_code
+        self.content = orjson.dumps(body)
+        self.headers = {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+def _ok(content: str) -> FakeResponse:
+    return FakeResponse(200, {"choices": [{"message": {"content": content}}]})
+
+
+def _rejected(code: str, **extra) -> FakeResponse:
+    return FakeResponse(400, {"error": {"code": code, "message": "rejected", **extra}})
+
+
+@pytest.fixture
+def groq(monkeypatch):
+    """Queue responses per model; records the model of every call."""
+    responses = {PRIMARY_MODEL: [], FALLBACK_MODEL: []}
+    calls = []
+
+    def fake_post(url, headers=None, data=None, timeout=None):
+        model = orjson.loads(data)["model"]
+        calls.append(model)
+        return responses[model].pop(0)
+
+    monkeypatch.setattr(client._session, "post", fake_post)
+    monkeypatch.setattr(client.time, "sleep", lambda s: None)
+    return responses, calls
+
+
+class TestGroqAskRejected:
+
+    def test_json_validate_failed_returns_raw_without_retry(self, groq):
+        responses, calls = groq
+        responses[PRIMARY_MODEL].append(
+            _rejected("json_validate_failed", failed_generation='{"title": "cut'))
+        assert groq_ask("system", "user") == {"raw": '{"title": "cut'}
+        assert calls == [PRIMARY_MODEL]
+
+    def test_model_specific_rejection_falls_back_to_next_model(self, groq):
+        responses, calls = groq
+        responses[PRIMARY_MODEL].append(_rejected("model_decommissioned"))
+        responses[FALLBACK_MODEL].append(_ok('{"ok": true}'))
+        assert groq_ask("system", "user") == {"ok": True}
+        assert calls == [PRIMARY_MODEL, FALLBACK_MODEL]
+
+    def test_rejection_on_every_model_returns_error(self, groq):
+        responses, calls = groq
+        responses[PRIMARY_MODEL].append(FakeResponse(413, {"error": {"message": "too large"}}))
+        responses[FALLBACK_MODEL].append(FakeResponse(413, {"error": {"message": "too large"}}))
+        assert "error" in groq_ask("system", "user")
+        assert calls == [PRIMARY_MODEL, FALLBACK_MODEL]
+
+
+class TestGroqAskStreamFallback:
+
+    def _stream_then_fail(self, *chunks):
+        def fake_stream(*args, **kwargs):
+            yield from chunks
+            raise RuntimeError("connection reset")
+        return fake_stream
+
+    def test_error_marker_dropped_after_streamed_fields(self, monkeypatch):
+        monkeypatch.setattr(client, "_stream_groq",
+                            self._stream_then_fail('{"title": "feat: x", "description": "d", '))
+        monkeypatch.setattr(client, "groq_ask", lambda *a, **k: {"error": "AI temporarily unavailable"})
+        assert list(client.groq_ask_stream("system", "user")) == [
+            ("title", "feat: x"), ("description", "d")]
+
+    def test_raw_marker_dropped_after_streamed_fields(self, monkeypatch):
+        monkeypatch.setattr(client, "_stream_groq",
+                            self._stream_then_fail('{"title": "feat: x", '))
+        monkeypatch.setattr(client, "groq_ask", lambda *a, **k: {"raw": "{\"title\": \"feat"})
+        assert list(client.groq_ask_stream("system", "user")) == [("title", "feat: x")]
+
+    def test_fallback_fills_missing_fields_only(self, monkeypatch):
+        monkeypatch.setattr(client, "_stream_groq",
+                            self._stream_then_fail('{"title": "streamed", '))
+        monkeypatch.setattr(client, "groq_ask",
+                            lambda *a, **k: {"title": "fallback", "labels": ["bug"]})
+        assert list(client.groq_ask_stream("system", "user")) == [
+            ("title", "streamed"), ("labels", ["bug"])]
+
+    def test_error_passed_through_when_nothing_streamed(self, monkeypatch):
+        monkeypatch.setattr(client, "_stream_groq", self._stream_then_fail())
+        monkeypatch.setattr(client, "groq_ask", lambda *a, **k: {"error": "AI temporarily unavailable"})
+        assert list(client.groq_ask_stream("system", "user")) == [
+            ("error", "AI temporarily unavailable")]
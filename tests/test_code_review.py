@@ -0,0 +1,187 @@
+"""
+tests/test_code_review.py
+Unit tests for the PR code-review pipeline (batching, per-file fallback, cache).
+groq_ask and gh_post are monkeypatched — no network calls needed.
+
+Run: python -m pytest tests/test_code_review.py -v
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.handlers import pull_request as pr
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+class MockConfig:
+    footer = ""
+
+    def __init__(self, max_files=4):
+        self._max_files = max_files
+
+    def get(self, *keys, default=None):
+        if keys == ("pull_requests", "max_files_reviewed"):
+            return self._max_files
+        return default
+
+
+def _file(name, patch="+x = 1"):
+    return {"filename": name, "patch": patch, "changes": 1, "status": "modified"}
+
+
+def _review(name=None, score=8):
+    review = {"score": score, "verdict": "ok", "issues": [], "positives": []}
+    if name is not None:
+        review["file"] = name
+    return review
+
+
+class FakeGroq:
+    """Stand-in for groq_ask: answers batch prompts with `batch`, per-file prompts with `single`."""
+
+    def __init__(self, batch=None, single=None):
+        self.batch = batch
+        self.single = single if single is not None else _review()
+        self.prompts = []
+
+    def __call__(self, system, user, max_tokens=500, fast=False, **kwargs):
+        self.prompts.append(user)
+        if user.startswith(pr._BATCH_REVIEW_INSTRUCTIONS):
+            return self.batch(user) if callable(self.batch) else self.batch
+        return self.single
+
+    @property
+    def batch_calls(self):
+        return sum(p.startswith(pr._BATCH_REVIEW_INSTRUCTIONS) for p in self.prompts)
+
+    @property
+    def single_calls(self):
+        return len(self.prompts) - self.batch_calls
+
+
+def _echo_batch(user):
+    """Review every file named in the batch prompt."""
+    names = [line[len("File: "):] for line in user.splitlines() if line.startswith("File: ")]
+    return {"reviews": [_review(n) for n in names]}
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    pr._review_cache.clear()
+    posted = []
+    monkeypatch.setattr(pr, "gh_post", lambda path, token, data: posted.append(data))
+    return posted
+
+
+def _install(monkeypatch, groq):
+    monkeypatch.setattr(pr, "groq_ask", groq)
+    return groq
+
+
+# ── Review cache ─────────────────────────────────────────────────────────────
+
+class TestReviewCache:
+
+    def test_unchanged_patch_skips_groq(self, monkeypatch):
+        files = [_file("a.py"), _file("b.py")]
+        groq = _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._run_code_review("user/repo", 1, "t", files, MockConfig())
+        assert groq.batch_calls == 1
+
+        groq = _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._run_code_review("user/repo", 1, "t", files, MockConfig())
+        assert groq.prompts == []
+
+    def test_changed_patch_is_reviewed_again(self, monkeypatch):
+        _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._run_code_review("user/repo", 1, "t", [_file("a.py"), _file("b.py")], MockConfig())
+
+        groq = _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._run_code_review("user/repo", 1, "t",
+                            [_file("a.py"), _file("b.py", "+y = 2")], MockConfig())
+        assert len(groq.prompts) == 1
+        assert "File: b.py" in groq.prompts[0]
+        assert "File: a.py" not in groq.prompts[0]
+
+    def test_failed_review_not_stored(self, monkeypatch):
+        _install(monkeypatch, FakeGroq(batch={"error": "down"}, single={"error": "down"}))
+        pr._run_code_review("user/repo", 1, "t", [_file("a.py")], MockConfig())
+        assert len(pr._review_cache) == 0
+
+    def test_oversize_patch_not_stored_or_hashed(self, monkeypatch):
+        big = _file("big.py", "+" * (pr.REVIEW_PATCH_CHARS + 1))
+        assert pr._review_key(big) is None
+        _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._run_code_review("user/repo", 1, "t", [big], MockConfig())
+        assert len(pr._review_cache) == 0
+
+    def test_empty_patch_not_stored(self, monkeypatch):
+        _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._run_code_review("user/repo", 1, "t", [_file("bin.py", "")], MockConfig())
+        assert len(pr._review_cache) == 0
+
+    def test_lru_bounded(self, monkeypatch):
+        monkeypatch.setattr(pr, "REVIEW_CACHE_SIZE", 2)
+        for name in ("a.py", "b.py", "c.py"):
+            pr._remember_review(pr._review_key(_file(name)), _review())
+        assert [k[0] for k in pr._review_cache] == ["b.py", "c.py"]
+
+
+# ── Batched review + per-file fallback ───────────────────────────────────────
+
+class TestReviewBatch:
+
+    def test_results_follow_input_order(self, monkeypatch):
+        def reversed_batch(user):
+            return {"reviews": [_review("b.py", 3), _review("a.py", 9)]}
+        _install(monkeypatch, FakeGroq(batch=reversed_batch))
+        results = pr._review_batch([_file("a.py"), _file("b.py")])
+        assert [r["score"] for r in results] == [9, 3]
+
+    def test_files_past_budget_not_sent(self, monkeypatch):
+        patch = "+" * pr.REVIEW_PATCH_CHARS
+        files = [_file(f"f{i}.py", patch) for i in range(6)]
+        groq = _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        results = pr._review_batch(files)
+
+        sent = pr.REVIEW_PROMPT_BUDGET // pr.REVIEW_PATCH_CHARS
+        assert [r is not None for r in results] == [True] * sent + [False] * (6 - sent)
+        for f in files[sent:]:
+            assert f"File: {f['filename']}" not in groq.prompts[0]
+
+    def test_patches_sent_as_plain_text(self, monkeypatch):
+        groq = _install(monkeypatch, FakeGroq(batch=_echo_batch))
+        pr._review_batch([_file("a.py", '+print("café")\n+x = 1')])
+        assert 'Patch:\n+print("café")\n+x = 1' in groq.prompts[0]
+
+
+class TestRunCodeReviewFallback:
+
+    def test_missing_file_reviewed_individually(self, monkeypatch):
+        groq = _install(monkeypatch, FakeGroq(batch={"reviews": [_review("a.py")]}))
+        pr._run_code_review("user/repo", 1, "t", [_file("a.py"), _file("b.py")], MockConfig())
+        assert groq.batch_calls == 1
+        assert groq.single_calls == 1
+        assert "File: b.py" in groq.prompts[1]
+
+    def test_misnamed_file_reviewed_individually(self, monkeypatch):
+        batch = {"reviews": [_review("a.py"), _review("src/b.py")]}
+        groq = _install(monkeypatch, FakeGroq(batch=batch))
+        pr._run_code_review("user/repo", 1, "t", [_file("a.py"), _file("b.py")], MockConfig())
+        assert groq.single_calls == 1
+
+    @pytest.mark.parametrize("batch", [
+        {"raw": "not json"},
+        {"error": "AI temporarily unavailable"},
+        {"reviews": "nope"},
+        ["not", "a", "dict"],
+    ])
+    def test_unusable_batch_falls_back_for_every_file(self, monkeypatch, isolated, batch):
+        groq = _install(monkeypatch, FakeGroq(batch=batch))
+        pr._run_code_review("user/repo", 1, "t", [_file("a.py"), _file("b.py")], MockConfig())
+        assert groq.single_calls == 2
+        assert len(isolated) == 1
+        assert "`a.py`" in isolated[0]["body"] and "`b.py`" in isolated[0]["body"]
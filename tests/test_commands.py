@@ -0,0 +1,56 @@
+"""
+tests/test_commands.py
+Pure unit tests for slash-command detection in issue comments.
+No network calls needed.
+
+Run: python -m pytest tests/test_commands.py -v
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.handlers.comments import _CMD_RE, ALL_COMMANDS
+
+
+def _detect(body: str):
+    match = _CMD_RE.search(body)
+    return f"/{match.group(1).lower()}" if match else None
+
+
+class TestCommandDetection:
+
+    @pytest.mark.parametrize("cmd", ALL_COMMANDS)
+    def test_every_command_detected(self, cmd):
+        assert _detect(cmd) == cmd
+
+    def test_command_inside_sentence(self):
+        assert _detect("Could you /explain this please?") == "/explain"
+
+    def test_case_insensitive(self):
+        assert _detect("/FIX") == "/fix"
+
+    def test_first_command_in_text_wins(self):
+        assert _detect("/test this, then /fix it") == "/test"
+        assert _detect("/fix it, then /test") == "/fix"
+
+    def test_command_at_line_start_after_newline(self):
+        assert _detect("Thanks!\n/docs") == "/docs"
+
+    def test_command_followed_by_punctuation(self):
+        assert _detect("/merge.") == "/merge"
+
+    def test_longer_word_rejected(self):
+        assert _detect("I /fixed it") is None
+        assert _detect("see /tests folder") is None
+
+    def test_path_segment_rejected(self):
+        assert _detect("look at src/test/app.py") is None
+        assert _detect("docs live in repo/docs") is None
+
+    def test_longer_word_skipped_for_later_command(self):
+        assert _detect("/fixed earlier, now /explain") == "/explain"
+
+    def test_no_command(self):
+        assert _detect("Looks good to me") is None
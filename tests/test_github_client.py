@@ -0,0 +1,118 @@
+"""
+tests/test_github_client.py
+Unit tests for the GitHub client's ETag cache and conditional GETs.
+The HTTP session is stubbed — no network calls, no GitHub token needed.
+
+Run: python -m pytest tests/test_github_client.py -v
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.github import client
+from app.github.client import gh_get, _remember_etag, _etag_cache
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", etag: str = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"ETag": etag} if etag else {}
+        self.links = {}
+        self.text = content.decode()
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    _etag_cache.clear()
+    monkeypatch.setattr(client, "_etag_bytes", 0)
+    monkeypatch.setattr(client, "check_and_wait", lambda: None)
+    monkeypatch.setattr(client, "update_from_headers", lambda headers: None)
+    yield
+    _etag_cache.clear()
+
+
+@pytest.fixture
+def github(monkeypatch):
+    """Queue responses; records the request headers of every call."""
+    responses = []
+    sent = []
+
+    def fake_request(method, url, headers=None, data=None, timeout=None):
+        sent.append(dict(headers))
+        return responses.pop(0)
+
+    monkeypatch.setattr(client.session, "request", fake_request)
+    return responses, sent
+
+
+class TestConditionalGet:
+
+    def test_304_serves_cached_body(self, github):
+        responses, sent = github
+        responses += [FakeResponse(200, b'{"title": "Bug"}', etag='"v1"'), FakeResponse(304)]
+        assert gh_get("/repos/u/r/issues/1", "t", conditional=True) == {"title": "Bug"}
+        assert gh_get("/repos/u/r/issues/1", "t", conditional=True) == {"title": "Bug"}
+        assert "If-None-Match" not in sent[0]
+        assert sent[1]["If-None-Match"] == '"v1"'
+
+    def test_each_caller_gets_its_own_object(self, github):
+        responses, _ = github
+        responses += [FakeResponse(200, b'{"labels": ["bug"]}', etag='"v1"'),
+                      FakeResponse(304), FakeResponse(304)]
+        first = gh_get("/repos/u/r/issues/1", "t", conditional=True)
+        first["labels"].append("mutated")
+        second = gh_get("/repos/u/r/issues/1", "t", conditional=True)
+        third = gh_get("/repos/u/r/issues/1", "t", conditional=True)
+        assert second == {"labels": ["bug"]}
+        assert second is not third
+        assert second["labels"] is not third["labels"]
+
+    def test_unconditional_get_not_cached(self, github):
+        responses, _ = github
+        responses.append(FakeResponse(200, b'{"a": 1}', etag='"v1"'))
+        gh_get("/repos/u/r", "t")
+        assert len(_etag_cache) == 0
+
+    def test_new_etag_replaces_entry(self, github):
+        responses, sent = github
+        responses += [FakeResponse(200, b'{"v": 1}', etag='"v1"'),
+                      FakeResponse(200, b'{"v": 2}', etag='"v2"'),
+                      FakeResponse(304)]
+        gh_get("/x", "t", conditional=True)
+        gh_get("/x", "t", conditional=True)
+        assert gh_get("/x", "t", conditional=True) == {"v": 2}
+        assert sent[2]["If-None-Match"] == '"v2"'
+        assert client._etag_bytes == len(b'{"v": 2}')
+
+
+class TestEtagCacheBounds:
+
+    def test_oversize_body_not_cached(self, monkeypatch):
+        monkeypatch.setattr(client, "_ETAG_MAX_ENTRY_BYTES", 10)
+        _remember_etag("/big", '"e"', b"x" * 11)
+        assert "/big" not in _etag_cache
+        assert client._etag_bytes == 0
+
+    def test_oversize_body_drops_stale_entry(self, monkeypatch):
+        monkeypatch.setattr(client, "_ETAG_MAX_ENTRY_BYTES", 10)
+        _remember_etag("/x", '"e1"', b"small")
+        _remember_etag("/x", '"e2"', b"x" * 11)
+        assert "/x" not in _etag_cache
+        assert client._etag_bytes == 0
+
+    def test_evicts_oldest_when_over_byte_cap(self, monkeypatch):
+        monkeypatch.setattr(client, "_ETAG_MAX_BYTES", 10)
+        _remember_etag("/a", '"a"', b"1234")
+        _remember_etag("/b", '"b"', b"1234")
+        _remember_etag("/c", '"c"', b"1234")
+        assert list(_etag_cache) == ["/b", "/c"]
+        assert client._etag_bytes == 8
+
+    def test_replacement_adjusts_byte_count(self):
+        _remember_etag("/a", '"a1"', b"12345678")
+        _remember_etag("/a", '"a2"', b"12")
+        assert _etag_cache["/a"] == ('"a2"', b"12")
+        assert client._etag_bytes == 2
@@ -11,7 +11,7 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.core.idempotency import make_fingerprint, is_duplicate, _seen
+from app.core.idempotency import make_fingerprint, is_duplicate, _seen, seen_recently, _recent
 
 
 def setup_function():
@@ -116,3 +116,61 @@ class TestFingerprintRealWebhookPayloads:
         fp_issue = make_fingerprint("delivery-1", "issues", issue_payload)
         assert fp_pr != fp_issue
 
+
+
+class TestSeenRecently:
+
+    def setup_method(self):
+        _recent.clear()
+
+    def test_first_call_returns_false(self):
+        assert seen_recently(("pull_request", "user/repo", 1, "opened")) is False
+
+    def test_repeat_within_window_returns_true(self):
+        key = ("pull_request", "user/repo", 1, "reopened")
+        seen_recently(key)
+        assert seen_recently(key) is True
+
+    def test_different_keys_are_independent(self):
+        assert seen_recently(("issues", "user/repo", 1, "opened")) is False
+        assert seen_recently(("issues", "user/repo", 2, "opened")) is False
+        assert seen_recently(("issues", "other/repo", 1, "opened")) is False
+
+    def test_expired_key_accepted_again(self):
+        key = ("issue_comment", "user/repo", 7, "/fix", "/fix this")
+        seen_recently(key)
+        _recent[key] -= 31
+        assert seen_recently(key) is False
+
+    def test_expired_keys_pruned(self):
+        seen_recently(("push", "user/repo", "refs/heads/main", "abc"))
+        for k in _recent:
+            _recent[k] -= 31
+        seen_recently(("push", "user/repo", "refs/heads/main", "def"))
+        assert len(_recent) == 1
+
+    def test_prune_stops_at_first_live_key(self):
+        seen_recently(("issues", "user/repo", 1, "opened"))
+        seen_recently(("issues", "user/repo", 2, "opened"))
+        seen_recently(("issues", "user/repo", 3, "opened"))
+        first, second, third = list(_recent)
+        _recent[first] -= 31
+        _recent[second] -= 31
+        seen_recently(("issues", "user/repo", 4, "opened"))
+        assert list(_recent) == [third, ("issues", "user/repo", 4, "opened")]
+
+
+class TestEviction:
+
+    def setup_method(self):
+        _seen.clear()
+
+    def test_expired_entries_evicted_live_kept(self):
+        is_duplicate("old-1")
+        is_duplicate("old-2")
+        is_duplicate("live-1")
+        _seen["old-1"] -= 3601
+        _seen["old-2"] -= 3601
+        assert is_duplicate("new-1") is False
+        assert list(_seen) == ["live-1", "new-1"]
+
@@ -0,0 +1,102 @@
+"""
+tests/test_server.py
+Tests for the webhook endpoint using Flask's test client.
+Handlers are stubbed — no network calls, no GitHub or Groq API needed.
+
+Run: python -m pytest tests/test_server.py -v
+"""
+
+import time
+import uuid
+import threading
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+
+
+@pytest.fixture
+def http(monkeypatch):
+    monkeypatch.setattr(server, "WEBHOOK_SECRET", b"")
+    return server.app.test_client()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Stub pull_request handler; records every payload it receives."""
+    received = []
+    monkeypatch.setitem(server.HANDLERS, "pull_request", received.append)
+    return received
+
+
+def _post(http, body: bytes, event: str = "pull_request"):
+    return http.post("/webhook", data=body, headers={
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": str(uuid.uuid4()),
+        "Content-Type": "application/json",
+    })
+
+
+class TestWebhookPayload:
+
+    @pytest.mark.parametrize("body", [b"", b"not json", b"[1, 2]", b'"text"', b"null"])
+    def test_bad_payload_rejected_and_not_queued(self, http, calls, body):
+        response = _post(http, body)
+        assert response.status_code == 400
+        server.EXECUTOR.submit(lambda: None).result()
+        assert calls == []
+
+
+class TestBackgroundQueue:
+
+    def _depth(self, http):
+        return http.get("/health").get_json()["queue_depth"]
+
+    def test_webhook_acks_before_handler_finishes(self, http, monkeypatch):
+        started, release = threading.Event(), threading.Event()
+        threads = []
+
+        def slow_handler(payload):
+            threads.append(threading.current_thread().name)
+            started.set()
+            release.wait(5)
+
+        monkeypatch.setitem(server.HANDLERS, "pull_request", slow_handler)
+        response = _post(http, b'{"action": "opened"}')
+        assert response.status_code == 200
+        assert response.get_json() == {"status": "queued"}
+
+        assert started.wait(5)
+        assert self._depth(http) == 1
+        release.set()
+        _wait_for_depth(http, 0)
+        assert threads[0].startswith("webhook")
+        assert threads[0] != threading.current_thread().name
+
+    def test_queue_depth_recovers_when_handler_raises(self, http, monkeypatch):
+        done = threading.Event()
+
+        def failing_handler(payload):
+            done.set()
+            raise RuntimeError("boom")
+
+        monkeypatch.setitem(server.HANDLERS, "pull_request", failing_handler)
+        assert _post(http, b'{"action": "opened"}').status_code == 200
+        assert done.wait(5)
+        _wait_for_depth(http, 0)
+
+    def test_unhandled_event_not_queued(self, http, calls):
+        response = _post(http, b'{"action": "created"}', event="star")
+        assert response.get_json() == {"status": "ignored"}
+        assert self._depth(http) == 0
+
+
+def _wait_for_depth(http, expected: int, timeout: float = 5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if http.get("/health").get_json()["queue_depth"] == expected:
+            return
+        time.sleep(0.01)
+    pytest.fail(f"queue_depth never reached {expected}")
@@ -0,0 +1,67 @@
+"""
+tests/test_signature.py
+Pure unit tests for webhook HMAC signature verification.
+No network calls needed.
+
+Run: python -m pytest tests/test_signature.py -v
+"""
+
+import hmac
+import hashlib
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+
+SECRET = b"test-secret"
+BODY = b'{"action": "opened"}'
+
+
+def _sign(body: bytes, secret: bytes = SECRET) -> str:
+    return "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(monkeypatch):
+    monkeypatch.setattr(server, "WEBHOOK_SECRET", SECRET)
+
+
+class TestVerifySignature:
+
+    def test_valid_digest_accepted(self):
+        assert server._verify_signature(BODY, _sign(BODY)) is True
+
+    def test_uppercase_hex_accepted(self):
+        sig = _sign(BODY)
+        assert server._verify_signature(BODY, "sha256=" + sig[7:].upper()) is True
+
+    def test_wrong_digest_rejected(self):
+        assert server._verify_signature(BODY, _sign(BODY, b"other-secret")) is False
+
+    def test_tampered_body_rejected(self):
+        assert server._verify_signature(BODY + b" ", _sign(BODY)) is False
+
+    def test_non_hex_rejected(self):
+        assert server._verify_signature(BODY, "sha256=" + "zz" * 32) is False
+
+    def test_odd_length_hex_rejected(self):
+        assert server._verify_signature(BODY, _sign(BODY)[:-1]) is False
+
+    def test_truncated_digest_rejected(self):
+        assert server._verify_signature(BODY, _sign(BODY)[:-2]) is False
+
+    def test_missing_prefix_rejected(self):
+        assert server._verify_signature(BODY, _sign(BODY)[7:]) is False
+
+    def test_sha1_prefix_rejected(self):
+        sig = "sha1=" + hmac.new(SECRET, BODY, hashlib.sha1).hexdigest()
+        assert server._verify_signature(BODY, sig) is False
+
+    def test_empty_signature_rejected(self):
+        assert server._verify_signature(BODY, "") is False
+
+    def test_no_secret_configured_skips_check(self, monkeypatch):
+        monkeypatch.setattr(server, "WEBHOOK_SECRET", b"")
+        assert server._verify_signature(BODY, "") is True
@@ -0,0 +1,72 @@
+"""
+tests/test_stream.py
+Pure unit tests for the incremental JSON parser used by streamed AI calls.
+No network calls needed.
+
+Run: python -m pytest tests/test_stream.py -v
+"""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.stream import IncrementalJSONParser
+
+
+def _feed_all(chunks):
+    parser = IncrementalJSONParser()
+    fields = []
+    for chunk in chunks:
+        fields.extend(parser.feed(chunk))
+    return parser, fields
+
+
+class TestIncrementalJSONParser:
+
+    def test_whole_object_in_one_chunk(self):
+        parser, fields = _feed_all(['{"a": 1, "b": "two"}'])
+        assert fields == [("a", 1), ("b", "two")]
+        assert parser.done
+
+    def test_field_emitted_as_soon_as_it_closes(self):
+        parser = IncrementalJSONParser()
+        assert parser.feed('{"improved_title": "feat: x"') == []
+        assert parser.feed(', "lab') == [("improved_title", "feat: x")]
+        assert not parser.done
+
+    def test_character_by_character(self):
+        text = '{"labels": ["a", "b"], "risk": {"level": "low"}}'
+        parser, fields = _feed_all(list(text))
+        assert fields == [("labels", ["a", "b"]), ("risk", {"level": "low"})]
+        assert parser.done
+
+    def test_commas_and_braces_inside_strings_ignored(self):
+        _, fields = _feed_all(['{"d": "a, b } c {", "e": "q\\"x,"}'])
+        assert fields == [("d", "a, b } c {"), ("e", 'q"x,')]
+
+    def test_nested_commas_do_not_split_fields(self):
+        _, fields = _feed_all(['{"issues": [{"a": 1, "b": 2}, {"c": 3}]}'])
+        assert fields == [("issues", [{"a": 1, "b": 2}, {"c": 3}])]
+
+    def test_markdown_fence_preamble_skipped(self):
+        _, fields = _feed_all(['```json\n{"a": ', '1}\n```'])
+        assert fields == [("a", 1)]
+
+    def test_text_after_object_ignored(self):
+        parser, fields = _feed_all(['{"a": 1} trailing {"b": 2}'])
+        assert fields == [("a", 1)]
+        assert parser.done
+
+    def test_malformed_field_skipped_not_raised(self):
+        _, fields = _feed_all(['{"a": oops, "b": 2}'])
+        assert fields == [("b", 2)]
+
+    def test_incomplete_stream_not_done(self):
+        parser, fields = _feed_all(['{"a": 1, "b": [1, 2'])
+        assert fields == [("a", 1)]
+        assert not parser.done
+
+    def test_unicode_preserved(self):
+        _, fields = _feed_all(['{"labels": ["type: feat ✨"]}'])
+        assert fields == [("labels", ["type: feat ✨"])]